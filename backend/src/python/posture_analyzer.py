@@ -8,274 +8,489 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import json
+import math
+import queue
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Warning bits returned by the posture analysis kernels
+_KNEE_PAST_TOE = 1
+_BACK_LEAN_OUT_OF_RANGE = 2
+_SQUAT_DEPTH_OUT_OF_RANGE = 4
+_NECK_FORWARD = 1
+_BACK_NOT_STRAIGHT = 2
+
+# Feedback text and angle keys shared by the JSON analysis and the video overlay
+_SQUAT_GOOD_FEEDBACK = "Good squat form"
+_SQUAT_ADJUST_FEEDBACK = "Adjust your squat form"
+_SITTING_GOOD_FEEDBACK = "Good sitting posture"
+_SITTING_ADJUST_FEEDBACK = "Adjust your sitting position"
+_KNEE_ANGLE_KEY = 'knee'
+_NECK_ANGLE_KEY = 'neck'
+_BACK_ANGLE_KEY = 'back'
+
+
+def _angle_scalar(ax, ay, bx, by, cx, cy):
+    # Angle at b between b->a and b->c, folded into [0, 180]
+    radians = math.atan2(cy - by, cx - bx) - math.atan2(ay - by, ax - bx)
+    angle = abs(math.degrees(radians))
+    if angle > 180.0:
+        angle = 360.0 - angle
+    return angle
+
+
+def _analyze_squat_core(hx, hy, kx, ky, ax, ay, tx, ty, sx, sy, facing_right):
+    knee_angle = _angle_scalar(hx, hy, kx, ky, ax, ay)
+    back_angle = _angle_scalar(sx, sy, hx, hy, kx, ky)
+
+    flags = 0
+    if (facing_right and kx > tx) or (not facing_right and kx < tx):
+        flags |= _KNEE_PAST_TOE
+    if not (30.0 <= back_angle <= 60.0):
+        flags |= _BACK_LEAN_OUT_OF_RANGE
+    if not (80.0 <= knee_angle <= 120.0):
+        flags |= _SQUAT_DEPTH_OUT_OF_RANGE
+    return knee_angle, back_angle, flags
+
+
+def _analyze_sitting_core(ex, sx, sy, hx, hy, kx, ky):
+    neck_angle = abs(ex - sx) * 100.0
+    back_angle = _angle_scalar(sx, sy, hx, hy, kx, ky)
+
+    flags = 0
+    if neck_angle > 10.0:
+        flags |= _NECK_FORWARD
+    if not (80.0 <= back_angle <= 115.0):
+        flags |= _BACK_NOT_STRAIGHT
+    return neck_angle, back_angle, flags
+
+
 class PostureAnalyzer:
+    # Longest side of the frame handed to pose.process in video mode
+    PROCESS_MAX_SIDE = 480
+    # Run pose inference on every Nth video frame
+    FRAME_STRIDE = 2
+
     def __init__(self):
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # Each process handles one file, so both graphs are built on first use:
+        # video gets the Lite model with tracking, single images the full static model
+        self.pose = None
+        self.image_pose = None
         self.mp_draw = mp.solutions.drawing_utils
 
-    def calculate_angle(self, a, b, c):
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-
-        ba = a - b
-        bc = c - b
-
-        cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-        # Clamp to avoid numerical errors
-        cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-
-        angle = np.arccos(cosine_angle)
-        return np.degrees(angle)
-
-
-    def detect_facing_direction(self, landmarks):
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].x
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x
-        nose = landmarks[self.mp_pose.PoseLandmark.NOSE.value].x
-
-        if nose > right_shoulder or nose > left_shoulder:
-            return "right"
-        else:
-            return "left"
-
-    def analyze_squat_posture(self, landmarks, facing):
-        pose = self.mp_pose
-
-        if facing == "left":
-            hip = [landmarks[pose.PoseLandmark.LEFT_HIP.value].x,
-                   landmarks[pose.PoseLandmark.LEFT_HIP.value].y]
-            knee = [landmarks[pose.PoseLandmark.LEFT_KNEE.value].x,
-                    landmarks[pose.PoseLandmark.LEFT_KNEE.value].y]
-            ankle = [landmarks[pose.PoseLandmark.LEFT_ANKLE.value].x,
-                     landmarks[pose.PoseLandmark.LEFT_ANKLE.value].y]
-            toe = [landmarks[pose.PoseLandmark.LEFT_FOOT_INDEX.value].x,
-                     landmarks[pose.PoseLandmark.LEFT_FOOT_INDEX.value].y]
-            shoulder = [landmarks[pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                        landmarks[pose.PoseLandmark.LEFT_SHOULDER.value].y]
-        else:
-            hip = [landmarks[pose.PoseLandmark.RIGHT_HIP.value].x,
-                   landmarks[pose.PoseLandmark.RIGHT_HIP.value].y]
-            knee = [landmarks[pose.PoseLandmark.RIGHT_KNEE.value].x,
-                    landmarks[pose.PoseLandmark.RIGHT_KNEE.value].y]
-            ankle = [landmarks[pose.PoseLandmark.RIGHT_ANKLE.value].x,
-                     landmarks[pose.PoseLandmark.RIGHT_ANKLE.value].y]
-            toe = [landmarks[pose.PoseLandmark.RIGHT_FOOT_INDEX.value].x,
-                     landmarks[pose.PoseLandmark.RIGHT_FOOT_INDEX.value].y]
-            shoulder = [landmarks[pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                        landmarks[pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-
-        knee_angle = self.calculate_angle(hip, knee, ankle)
-        back_angle = self.calculate_angle(shoulder, hip, knee)
+        # Resolve landmark indices once instead of walking the enum every frame
+        lm = self.mp_pose.PoseLandmark
+        self.LM_NOSE = int(lm.NOSE)
+        self.LM_L_EAR = int(lm.LEFT_EAR)
+        self.LM_R_EAR = int(lm.RIGHT_EAR)
+        self.LM_L_SHOULDER = int(lm.LEFT_SHOULDER)
+        self.LM_R_SHOULDER = int(lm.RIGHT_SHOULDER)
+        self.LM_L_HIP = int(lm.LEFT_HIP)
+        self.LM_R_HIP = int(lm.RIGHT_HIP)
+        self.LM_L_KNEE = int(lm.LEFT_KNEE)
+        self.LM_R_KNEE = int(lm.RIGHT_KNEE)
+        self.LM_L_ANKLE = int(lm.LEFT_ANKLE)
+        self.LM_R_ANKLE = int(lm.RIGHT_ANKLE)
+        self.LM_L_FOOT_INDEX = int(lm.LEFT_FOOT_INDEX)
+        self.LM_R_FOOT_INDEX = int(lm.RIGHT_FOOT_INDEX)
+
+        # Joints of the side facing the camera, in row order: ear, shoulder, hip, knee, ankle, toe
+        self._side_idx = {
+            "left": np.array([self.LM_L_EAR, self.LM_L_SHOULDER, self.LM_L_HIP,
+                              self.LM_L_KNEE, self.LM_L_ANKLE, self.LM_L_FOOT_INDEX]),
+            "right": np.array([self.LM_R_EAR, self.LM_R_SHOULDER, self.LM_R_HIP,
+                               self.LM_R_KNEE, self.LM_R_ANKLE, self.LM_R_FOOT_INDEX]),
+        }
+
+        connections = sorted(self.mp_pose.POSE_CONNECTIONS)
+        self._conn_start = np.array([c[0] for c in connections], dtype=np.int32)
+        self._conn_end = np.array([c[1] for c in connections], dtype=np.int32)
+
+        # (back, knee, neck) landmark sets highlighted by draw_custom_landmarks
+        self._color_sets = {
+            "left": (frozenset([self.LM_L_SHOULDER, self.LM_L_HIP, self.LM_L_KNEE]),
+                     frozenset([self.LM_L_HIP, self.LM_L_KNEE, self.LM_L_ANKLE]),
+                     frozenset([self.LM_L_EAR, self.LM_L_SHOULDER])),
+            "right": (frozenset([self.LM_R_SHOULDER, self.LM_R_HIP, self.LM_R_KNEE]),
+                      frozenset([self.LM_R_HIP, self.LM_R_KNEE, self.LM_R_ANKLE]),
+                      frozenset([self.LM_R_EAR, self.LM_R_SHOULDER])),
+        }
+
+    def close(self):
+        # MediaPipe's close() can't run twice, so drop each graph once it is closed
+        if self.pose is not None:
+            self.pose.close()
+            self.pose = None
+        if self.image_pose is not None:
+            self.image_pose.close()
+            self.image_pose = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
 
+    def landmarks_to_array(self, landmarks):
+        # Normalized (x, y) of every landmark as one (33, 2) array, built once per frame
+        return np.fromiter((v for lm in landmarks for v in (lm.x, lm.y)),
+                           dtype=np.float32, count=2 * len(landmarks)).reshape(-1, 2)
+
+    def detect_facing_direction(self, coords):
+        # .item() yields Python floats, so the comparison below skips NumPy scalar dispatch
+        left_shoulder = coords.item(self.LM_L_SHOULDER, 0)
+        right_shoulder = coords.item(self.LM_R_SHOULDER, 0)
+        nose = coords.item(self.LM_NOSE, 0)
+
+        facing = "right" if nose > min(left_shoulder, right_shoulder) else "left"
+        # Fetch that side's joints in one go so the analyzers don't index coords again
+        return facing, coords[self._side_idx[facing]]
+
+    def measure_squat_posture(self, side, facing):
+        _, _, sx, sy, hx, hy, kx, ky, ax, ay, tx, ty = side.ravel().tolist()
+        return _analyze_squat_core(hx, hy, kx, ky, ax, ay, tx, ty, sx, sy, facing == "right")
+
+    def measure_sitting_posture(self, side, facing):
+        ex, _, sx, sy, hx, hy, kx, ky = side[:4].ravel().tolist()
+        return _analyze_sitting_core(ex, sx, sy, hx, hy, kx, ky)
+
+    def analyze_squat_posture(self, side, facing):
+        return self.build_squat_analysis(*self.measure_squat_posture(side, facing))
+
+    def analyze_sitting_posture(self, side, facing):
+        return self.build_sitting_analysis(*self.measure_sitting_posture(side, facing))
+
+    def build_squat_analysis(self, knee_angle, back_angle, flags):
         warnings = []
-        is_good_posture = True
+        is_good_posture = flags == 0
 
-        if (facing == "right" and knee[0] > toe[0]) or (facing == "left" and knee[0] < toe[0]):
+        if flags & _KNEE_PAST_TOE:
             warnings.append("Knee extends beyond toe - risk of injury")
-            is_good_posture = False
 
-        if not (30 <= back_angle <= 60):
+        if flags & _BACK_LEAN_OUT_OF_RANGE:
             warnings.append("Back angle too upright or too low - maintain natural forward lean (30° to 60° wrt thigh)")
-            is_good_posture = False
 
-        if not (80 <= knee_angle <= 120):
+        if flags & _SQUAT_DEPTH_OUT_OF_RANGE:
             warnings.append("Squat depth needs improvement - aim for 90-degree knee bend (80° to 120°)")
-            is_good_posture = False
 
-        feedback = "Good squat form" if is_good_posture else "Adjust your squat form"
+        feedback = _SQUAT_GOOD_FEEDBACK if is_good_posture else _SQUAT_ADJUST_FEEDBACK
 
         return {
             'isGoodPosture': is_good_posture,
             'feedback': feedback,
             'angles': {
-                'knee': round(knee_angle, 1),
-                'back': round(back_angle, 1)
+                _KNEE_ANGLE_KEY: round(knee_angle, 1),
+                _BACK_ANGLE_KEY: round(back_angle, 1)
             },
             'warnings': warnings
         }
 
-    def analyze_sitting_posture(self, landmarks, facing):
-        pose = self.mp_pose
-
-        if facing == "left":
-            ear = [landmarks[pose.PoseLandmark.LEFT_EAR.value].x,
-                   landmarks[pose.PoseLandmark.LEFT_EAR.value].y]
-            shoulder = [landmarks[pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                        landmarks[pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            hip = [landmarks[pose.PoseLandmark.LEFT_HIP.value].x,
-                   landmarks[pose.PoseLandmark.LEFT_HIP.value].y]
-            knee = [landmarks[pose.PoseLandmark.LEFT_KNEE.value].x,
-                    landmarks[pose.PoseLandmark.LEFT_KNEE.value].y]
-        else:
-            ear = [landmarks[pose.PoseLandmark.RIGHT_EAR.value].x,
-                   landmarks[pose.PoseLandmark.RIGHT_EAR.value].y]
-            shoulder = [landmarks[pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                        landmarks[pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-            hip = [landmarks[pose.PoseLandmark.RIGHT_HIP.value].x,
-                   landmarks[pose.PoseLandmark.RIGHT_HIP.value].y]
-            knee = [landmarks[pose.PoseLandmark.RIGHT_KNEE.value].x,
-                    landmarks[pose.PoseLandmark.RIGHT_KNEE.value].y]
-
-        neck_angle = abs(ear[0] - shoulder[0]) * 100
-        back_angle = self.calculate_angle(shoulder, hip, knee)
-
+    def build_sitting_analysis(self, neck_angle, back_angle, flags):
         warnings = []
-        is_good_posture = True
+        is_good_posture = flags == 0
 
-        if neck_angle > 10:
+        if flags & _NECK_FORWARD:
             warnings.append("Adjust head posture - align ears over shoulders (20° max)")
-            is_good_posture = False
 
-        if not (80 <= back_angle <= 115):
+        if flags & _BACK_NOT_STRAIGHT:
             warnings.append("Back not straight - maintain neutral spine (80° to 115°)")
-            is_good_posture = False
 
-        feedback = "Good sitting posture" if is_good_posture else "Adjust your sitting position"
+        feedback = _SITTING_GOOD_FEEDBACK if is_good_posture else _SITTING_ADJUST_FEEDBACK
 
         return {
             'isGoodPosture': is_good_posture,
             'feedback': feedback,
             'angles': {
-                'neck': round(neck_angle, 1),
-                'back': round(back_angle, 1)
+                _NECK_ANGLE_KEY: round(neck_angle, 1),
+                _BACK_ANGLE_KEY: round(back_angle, 1)
             },
             'warnings': warnings
         }
 
-    def draw_custom_landmarks(self, image, landmarks, facing):
+    def draw_custom_landmarks(self, image, coords, facing):
         h, w, _ = image.shape
+        px = (coords * np.array([w, h], dtype=np.float32)).astype(np.int32)
+
+        back_set, knee_set, neck_set = self._color_sets[facing]
 
-        pose = self.mp_pose
-
-        if facing == "left":
-            back_pts = [pose.PoseLandmark.LEFT_SHOULDER.value,
-                        pose.PoseLandmark.LEFT_HIP.value,
-                        pose.PoseLandmark.LEFT_KNEE.value]
-            knee_pts = [pose.PoseLandmark.LEFT_HIP.value,
-                        pose.PoseLandmark.LEFT_KNEE.value,
-                        pose.PoseLandmark.LEFT_ANKLE.value]
-            neck_pts = [pose.PoseLandmark.LEFT_EAR.value,
-                        pose.PoseLandmark.LEFT_SHOULDER.value]
-        else:
-            back_pts = [pose.PoseLandmark.RIGHT_SHOULDER.value,
-                        pose.PoseLandmark.RIGHT_HIP.value,
-                        pose.PoseLandmark.RIGHT_KNEE.value]
-            knee_pts = [pose.PoseLandmark.RIGHT_HIP.value,
-                        pose.PoseLandmark.RIGHT_KNEE.value,
-                        pose.PoseLandmark.RIGHT_ANKLE.value]
-            neck_pts = [pose.PoseLandmark.RIGHT_EAR.value,
-                        pose.PoseLandmark.RIGHT_SHOULDER.value]
-
-        for connection in pose.POSE_CONNECTIONS:
-            start_idx, end_idx = connection
-            start = landmarks[start_idx]
-            end = landmarks[end_idx]
-            x1, y1 = int(start.x * w), int(start.y * h)
-            x2, y2 = int(end.x * w), int(end.y * h)
-            cv2.line(image, (x1, y1), (x2, y2), (255, 255, 255), 2)
-
-        for idx, lm in enumerate(landmarks):
-            cx, cy = int(lm.x * w), int(lm.y * h)
+        # (N, 2, 2) array of two-point polylines: every bone drawn in one OpenCV call
+        segments = np.stack((px[self._conn_start], px[self._conn_end]), axis=1)
+        cv2.polylines(image, segments, False, (255, 255, 255), 2)
+
+        for idx, (cx, cy) in enumerate(px.tolist()):
             color = (255, 255, 255)
-            if idx in back_pts:
+            if idx in back_set:
                 color = (0, 0, 0)
-            elif idx in knee_pts:
+            elif idx in knee_set:
                 color = (139, 0, 0)
-            elif idx in neck_pts:
+            elif idx in neck_set:
                 color = (0, 0, 139)
             cv2.circle(image, (cx, cy), 6, color, -1)
 
+    def draw_feedback(self, image, feedback, is_good_posture, angles):
+        color = (0, 255, 0) if is_good_posture else (0, 0, 255)
+        cv2.putText(image, feedback, (20, 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, color, 3, cv2.LINE_AA)
+
+        y_offset = 80
+        for angle_name, angle_value in angles:
+            text = f"{angle_name.capitalize()}: {angle_value} deg"
+            cv2.putText(image, text, (20, y_offset),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
+            y_offset += 35
+
+    def _open_capture(self, input_path):
+        # Prefer hardware decoding; VIDEO_ACCELERATION_ANY falls back to software
+        # when no device is available, but older FFmpeg builds may reject the params
+        cap = cv2.VideoCapture(input_path, cv2.CAP_FFMPEG,
+                               [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY,
+                                cv2.CAP_PROP_HW_DEVICE, 0])
+        if not cap.isOpened():
+            cap = cv2.VideoCapture(input_path)
+        return cap
+
+    def _open_writer(self, output_path, fps, size):
+        # H.264 lets FFmpeg pick a hardware encoder (NVENC, QSV, VAAPI...); many
+        # OpenCV builds ship without one, so fall back to software and then to mp4v
+        hw_params = [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        for codec in ('avc1', 'mp4v'):
+            fourcc = cv2.VideoWriter_fourcc(*codec)
+            out = cv2.VideoWriter(output_path, cv2.CAP_FFMPEG, fourcc, fps, size, hw_params)
+            if not out.isOpened():
+                out = cv2.VideoWriter(output_path, fourcc, fps, size)
+            if out.isOpened():
+                return out
+        return out
+
+    def _processing_size(self, height, width):
+        scale = min(1.0, self.PROCESS_MAX_SIDE / max(height, width))
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _read_frames(self, cap, frames, stop):
+        # Decode stage: runs on its own thread and feeds the bounded frame queue.
+        # The sentinel is sent even if decoding fails, so the main loop never waits forever
+        read, put = cap.read, frames.put
+        try:
+            while cap.isOpened() and not stop.is_set():
+                ret, frame = read()
+                if not ret:
+                    break
+                put(frame)
+        finally:
+            put(None)
+
+    def _write_frames(self, out, frames, stop):
+        # Encode stage: drains annotated frames until the None sentinel arrives. After a
+        # write error it stops the reader but keeps draining so producers never block,
+        # then re-raises for writer.result()
+        get, write = frames.get, out.write
+        error = None
+        while True:
+            frame = get()
+            if frame is None:
+                break
+            if error is None:
+                try:
+                    write(frame)
+                except Exception as e:
+                    error = e
+                    stop.set()
+        if error is not None:
+            raise error
+
+    def _create_video_pose(self, model_complexity):
+        return self.mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            smooth_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
     def process_video(self, input_path, output_path, posture_type):
-        cap = cv2.VideoCapture(input_path)
+        if self.pose is None:
+            try:
+                self.pose = self._create_video_pose(model_complexity=0)
+            except OSError:
+                # The Lite model isn't bundled with MediaPipe and is downloaded into
+                # site-packages on first use; offline or read-only installs can't
+                # fetch it, so fall back to the bundled full model
+                self.pose = self._create_video_pose(model_complexity=1)
+
+        cap = self._open_capture(input_path)
 
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-
-        analysis_results = []
-        frame_count = 0
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            frame_count += 1
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(rgb_frame)
+        out = self._open_writer(output_path, fps, (width, height))
 
-            if results.pose_landmarks:
-                facing = self.detect_facing_direction(results.pose_landmarks.landmark)
-                self.draw_custom_landmarks(frame, results.pose_landmarks.landmark, facing)
+        # Per-inference results kept as columns and only turned into the JSON-ready
+        # list of dicts once the video is done; grown by doubling if the container's
+        # frame count was an underestimate
+        kind = 'squat' if posture_type == 'squat' else 'sitting'
+        capacity = max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) // self.FRAME_STRIDE + 1)
+        res_angle = np.empty(capacity, dtype=np.float64)
+        res_back = np.empty(capacity, dtype=np.float64)
+        res_flags = np.empty(capacity, dtype=np.uint8)
+        res_ts = np.empty(capacity, dtype=np.float64)
+        n_results = 0
 
-                if posture_type == 'squat':
-                    analysis = self.analyze_squat_posture(results.pose_landmarks.landmark, facing)
+        frame_count = 0
+        # Downscaled BGR/RGB buffers reused across frames; only reallocated when the
+        # frame size changes. Landmarks are normalized, so drawing on the full-size
+        # frame is unaffected by the smaller inference input.
+        frame_hw = None
+        overlay = None
+
+        # Decode and encode overlap with inference on worker threads
+        read_queue = queue.Queue(maxsize=4)
+        # Deeper on the encode side so encoder stalls don't back up into inference
+        write_queue = queue.Queue(maxsize=16)
+        stop = threading.Event()
+
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                reader = executor.submit(self._read_frames, cap, read_queue, stop)
+                writer = executor.submit(self._write_frames, out, write_queue, stop)
+
+                # Hot-loop callables bound as locals to skip repeated attribute lookups
+                next_frame = read_queue.get
+                emit_frame = write_queue.put
+                resize = cv2.resize
+                cvtColor = cv2.cvtColor
+                pose_process = self.pose.process
+                to_array = self.landmarks_to_array
+                detect_facing = self.detect_facing_direction
+                measure = (self.measure_squat_posture if kind == 'squat'
+                           else self.measure_sitting_posture)
+                if kind == 'squat':
+                    angle_name, good_feedback, adjust_feedback = (
+                        _KNEE_ANGLE_KEY, _SQUAT_GOOD_FEEDBACK, _SQUAT_ADJUST_FEEDBACK)
                 else:
-                    analysis = self.analyze_sitting_posture(results.pose_landmarks.landmark, facing)
-
-                analysis['timestamp'] = frame_count / fps
-                analysis['postureType'] = posture_type
-                analysis_results.append(analysis)
-
-                color = (0, 255, 0) if analysis['isGoodPosture'] else (0, 0, 255)
-                cv2.putText(frame, analysis['feedback'], (20, 40),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, color, 3, cv2.LINE_AA)
-
-                y_offset = 80
-                for angle_name, angle_value in analysis['angles'].items():
-                    text = f"{angle_name.capitalize()}: {angle_value} deg"
-                    cv2.putText(frame, text, (20, y_offset),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
-                    y_offset += 35
-
-            out.write(frame)
-
-        cap.release()
-        out.release()
+                    angle_name, good_feedback, adjust_feedback = (
+                        _NECK_ANGLE_KEY, _SITTING_GOOD_FEEDBACK, _SITTING_ADJUST_FEEDBACK)
+                draw = self.draw_custom_landmarks
+                draw_feedback = self.draw_feedback
+                INTER_AREA = cv2.INTER_AREA
+                BGR2RGB = cv2.COLOR_BGR2RGB
+                stride = self.FRAME_STRIDE
+
+                try:
+                    while True:
+                        frame = next_frame()
+                        if frame is None:
+                            break
+
+                        frame_count += 1
+                        # Pose inference only runs on every FRAME_STRIDE-th frame; the frames
+                        # in between reuse the last landmarks and analysis for the overlay
+                        if (frame_count - 1) % stride == 0:
+                            if frame.shape[:2] != frame_hw:
+                                frame_hw = frame.shape[:2]
+                                proc_w, proc_h = self._processing_size(*frame_hw)
+                                downscale = (proc_h, proc_w) != frame_hw
+                                small_frame = np.empty((proc_h, proc_w, 3), dtype=np.uint8)
+                                rgb_frame = np.empty_like(small_frame)
+
+                            if downscale:
+                                resize(frame, (proc_w, proc_h), dst=small_frame,
+                                       interpolation=INTER_AREA)
+                                cvtColor(small_frame, BGR2RGB, dst=rgb_frame)
+                            else:
+                                cvtColor(frame, BGR2RGB, dst=rgb_frame)
+                            results = pose_process(rgb_frame)
+
+                            overlay = None
+                            if results.pose_landmarks:
+                                coords = to_array(results.pose_landmarks.landmark)
+                                facing, side = detect_facing(coords)
+                                angle, back_angle, flags = measure(side, facing)
+
+                                if n_results == len(res_ts):
+                                    res_angle, res_back, res_flags, res_ts = (
+                                        np.concatenate((col, np.empty_like(col)))
+                                        for col in (res_angle, res_back, res_flags, res_ts))
+                                res_angle[n_results] = angle
+                                res_back[n_results] = back_angle
+                                res_flags[n_results] = flags
+                                res_ts[n_results] = frame_count / fps
+                                n_results += 1
+
+                                is_good = flags == 0
+                                overlay = (coords, facing,
+                                           good_feedback if is_good else adjust_feedback, is_good,
+                                           ((angle_name, round(angle, 1)), (_BACK_ANGLE_KEY, round(back_angle, 1))))
+
+                        if overlay is not None:
+                            coords, facing, feedback, is_good, angles = overlay
+                            draw(frame, coords, facing)
+                            draw_feedback(frame, feedback, is_good, angles)
+
+                        emit_frame(frame)
+                finally:
+                    stop.set()
+                    # Unblock the reader in case it is waiting on a full queue
+                    while not reader.done():
+                        try:
+                            read_queue.get(timeout=0.1)
+                        except queue.Empty:
+                            pass
+                    write_queue.put(None)
+
+                reader.result()
+                writer.result()
+        finally:
+            cap.release()
+            out.release()
+
+        build = self.build_squat_analysis if kind == 'squat' else self.build_sitting_analysis
+        analysis_results = []
+        for angle, back_angle, flags, timestamp in zip(res_angle[:n_results].tolist(),
+                                                       res_back[:n_results].tolist(),
+                                                       res_flags[:n_results].tolist(),
+                                                       res_ts[:n_results].tolist()):
+            analysis = build(angle, back_angle, flags)
+            analysis['timestamp'] = timestamp
+            analysis['postureType'] = posture_type
+            analysis_results.append(analysis)
 
         return analysis_results
 
     def process_image(self, input_path, output_path, posture_type):
+        if self.image_pose is None:
+            self.image_pose = self.mp_pose.Pose(
+                static_image_mode=True,
+                model_complexity=1,
+                min_detection_confidence=0.5
+            )
+
         image = cv2.imread(input_path)
         rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb_image)
+        results = self.image_pose.process(rgb_image)
 
         analysis_results = []
 
         if results.pose_landmarks:
-            facing = self.detect_facing_direction(results.pose_landmarks.landmark)
-            self.draw_custom_landmarks(image, results.pose_landmarks.landmark, facing)
+            coords = self.landmarks_to_array(results.pose_landmarks.landmark)
+            facing, side = self.detect_facing_direction(coords)
+            self.draw_custom_landmarks(image, coords, facing)
 
             if posture_type == 'squat':
-                analysis = self.analyze_squat_posture(results.pose_landmarks.landmark, facing)
+                analysis = self.analyze_squat_posture(side, facing)
             else:
-                analysis = self.analyze_sitting_posture(results.pose_landmarks.landmark, facing)
+                analysis = self.analyze_sitting_posture(side, facing)
 
             analysis['timestamp'] = 0
             analysis['postureType'] = posture_type
             analysis_results.append(analysis)
 
-            color = (0, 255, 0) if analysis['isGoodPosture'] else (0, 0, 255)
-            cv2.putText(image, analysis['feedback'], (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 3, cv2.LINE_AA)
-
-            y_offset = 80
-            for angle_name, angle_value in analysis['angles'].items():
-                text = f"{angle_name.capitalize()}: {angle_value} deg"
-                cv2.putText(image, text, (20, y_offset),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
-                y_offset += 35
+            self.draw_feedback(image, analysis['feedback'], analysis['isGoodPosture'],
+                               analysis['angles'].items())
 
         cv2.imwrite(output_path, image)
         return analysis_results
@@ -289,15 +504,14 @@ def main():
     output_path = sys.argv[2]
     posture_type = sys.argv[3]
 
-    analyzer = PostureAnalyzer()
-
     try:
         file_extension = Path(input_path).suffix.lower()
 
-        if file_extension in ['.mp4', '.avi', '.mov']:
-            results = analyzer.process_video(input_path, output_path, posture_type)
-        else:
-            results = analyzer.process_image(input_path, output_path, posture_type)
+        with PostureAnalyzer() as analyzer:
+            if file_extension in ['.mp4', '.avi', '.mov']:
+                results = analyzer.process_video(input_path, output_path, posture_type)
+            else:
+                results = analyzer.process_image(input_path, output_path, posture_type)
 
         output_data = {
             'success': True,